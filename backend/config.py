@@ -55,6 +55,8 @@ class Config:
     # GenAI (Gemini) 格式专用配置
     GENAI_TIMEOUT = float(os.getenv('GENAI_TIMEOUT', '300.0'))  # Gemini 超时时间（秒）
     GENAI_MAX_RETRIES = int(os.getenv('GENAI_MAX_RETRIES', '2'))  # Gemini 最大重试次数（应用层实现）
+    GENAI_CONTEXT_CACHE_TTL = int(os.getenv('GENAI_CONTEXT_CACHE_TTL', '600'))  # 页面描述公共前缀的上下文缓存有效期（秒），0 表示禁用
+    GENAI_CONTEXT_CACHE_MIN_CHARS = int(os.getenv('GENAI_CONTEXT_CACHE_MIN_CHARS', '8000'))  # 公共前缀短于该字符数时不创建上下文缓存（低于模型最小缓存长度）
     
     # OpenAI 格式专用配置（当 AI_PROVIDER_FORMAT=openai 时使用）
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')  # 当 AI_PROVIDER_FORMAT=openai 时必须设置
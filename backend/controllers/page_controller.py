@@ -2,11 +2,17 @@
 Page Controller - handles page-related endpoints
 """
 import logging
-from flask import Blueprint, request, current_app
+from functools import lru_cache
+from flask import Blueprint, request, current_app, g
+from sqlalchemy import func, text
+from sqlalchemy.orm import load_only
 from models import db, Project, Page, PageImageVersion, Task
 from utils import success_response, error_response, not_found, bad_request
 from services import AIService, FileService, ProjectContext
-from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
+from services.task_manager import (
+    task_manager, generate_single_page_description_task,
+    generate_single_page_image_task, edit_page_image_task
+)
 from datetime import datetime
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -19,6 +25,170 @@ logger = logging.getLogger(__name__)
 page_bp = Blueprint('pages', __name__, url_prefix='/api/projects')
 
 
+@page_bp.before_request
+def _set_request_timestamp():
+    """Compute one timestamp per request so page and project updated_at match"""
+    g.now = datetime.utcnow()
+
+
+def _get_page_with_project(project_id: str, page_id: str, page_columns: tuple = None):
+    """
+    Load a page together with its project in a single JOIN query
+    
+    Args:
+        project_id: Project ID
+        page_id: Page ID
+        page_columns: Optional Page columns to load (load_only); other columns such as
+                      the large JSON blobs are deferred until accessed
+        
+    Returns:
+        (page, project) tuple, or (None, None) if the page does not belong to the project
+    """
+    query = db.session.query(Page, Project)\
+        .join(Project, Project.id == Page.project_id)\
+        .filter(Page.id == page_id, Page.project_id == project_id)
+    if page_columns:
+        query = query.options(load_only(*page_columns))
+    row = query.first()
+    return row if row else (None, None)
+
+
+def _renumber_pages(project_id: str):
+    """
+    Renumber order_index of project pages to a gap-free 0..N-1 sequence
+    
+    Uses a single UPDATE with a row_number() window, independent of page count.
+    Runs inside the caller's transaction; pending ORM changes are flushed first.
+    
+    Args:
+        project_id: Project ID
+    """
+    db.session.flush()
+    db.session.execute(text("""
+        UPDATE pages SET order_index = s.rn - 1
+        FROM (
+            SELECT id, row_number() OVER (ORDER BY order_index, created_at) AS rn
+            FROM pages WHERE project_id = :project_id
+        ) AS s
+        WHERE pages.id = s.id AND pages.order_index != s.rn - 1
+    """), {'project_id': project_id})
+
+
+def _get_requested_fields():
+    """
+    Parse the optional ?fields=status,page_id,... query parameter
+    
+    Returns:
+        Set of requested page dict keys, or None to return all fields
+    """
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()} or None
+
+
+def _load_page_outlines(project_id: str) -> list:
+    """
+    Load (part, outline_content) of all project pages in one compact SELECT
+    
+    Only the needed columns are fetched, so no Page objects are hydrated.
+    
+    Args:
+        project_id: Project ID
+        
+    Returns:
+        List of (part, outline_dict) tuples ordered by order_index,
+        pages without a valid outline are skipped
+    """
+    rows = db.session.query(Page.part, Page.outline_content)\
+        .filter_by(project_id=project_id)\
+        .order_by(Page.order_index)\
+        .all()
+    
+    page_outlines = []
+    for part, outline_json in rows:
+        if not outline_json:
+            continue
+        try:
+            page_outlines.append((part, json.loads(outline_json)))
+        except json.JSONDecodeError:
+            continue
+    return page_outlines
+
+
+@lru_cache(maxsize=256)
+def _build_outline(project_id: str, updated_at_iso: str, group_parts: bool = False) -> tuple:
+    """
+    Build the full project outline from its pages, cached per project revision
+    
+    project.updated_at is part of the cache key, so stale entries are invalidated
+    implicitly. Per-page generation of an N-page project therefore rebuilds the
+    outline once instead of N times.
+    
+    Invariant: every code path that creates, deletes or reorders pages, or changes a
+    page's outline_content or part (here and in project_controller), MUST also bump
+    project.updated_at, otherwise this cache keeps serving the old outline.
+    
+    Args:
+        project_id: Project ID
+        updated_at_iso: project.updated_at in ISO format (cache key only)
+        group_parts: If True, group pages under {"part": ..., "pages": [...]} items,
+                     otherwise return a flat page list with an optional 'part' key
+        
+    Returns:
+        Outline items as a tuple; the contained dicts are shared between callers
+        and must be treated as read-only
+    """
+    outline = []
+    if not group_parts:
+        for part, page_data in _load_page_outlines(project_id):
+            if part:
+                page_data['part'] = part
+            outline.append(page_data)
+        return tuple(outline)
+    
+    current_part = None
+    current_part_pages = []
+    
+    for part, page_data in _load_page_outlines(project_id):
+        # 如果当前页面属于一个 part
+        if part:
+            # 如果这是新的 part，先保存之前的 part（如果有）
+            if current_part and current_part != part:
+                outline.append({
+                    "part": current_part,
+                    "pages": current_part_pages
+                })
+                current_part_pages = []
+            
+            current_part = part
+            # 移除 part 字段，因为它在顶层
+            if 'part' in page_data:
+                del page_data['part']
+            current_part_pages.append(page_data)
+        else:
+            # 如果当前页面不属于任何 part，先保存之前的 part（如果有）
+            if current_part:
+                outline.append({
+                    "part": current_part,
+                    "pages": current_part_pages
+                })
+                current_part = None
+                current_part_pages = []
+            
+            # 直接添加页面
+            outline.append(page_data)
+    
+    # 保存最后一个 part（如果有）
+    if current_part:
+        outline.append({
+            "part": current_part,
+            "pages": current_part_pages
+        })
+    
+    return tuple(outline)
+
+
 @page_bp.route('/<project_id>/pages', methods=['POST'])
 def create_page(project_id):
     """
@@ -42,10 +212,17 @@ def create_page(project_id):
         if not data or 'order_index' not in data:
             return bad_request("order_index is required")
         
+        # Appending at the tail (the common case) needs no shift or renumbering
+        current_max = db.session.query(func.max(Page.order_index))\
+            .filter_by(project_id=project_id).scalar()
+        if current_max is None:
+            current_max = -1
+        is_append = data['order_index'] > current_max
+        
         # Create new page
         page = Page(
             project_id=project_id,
-            order_index=data['order_index'],
+            order_index=current_max + 1 if is_append else data['order_index'],
             part=data.get('part'),
             status='DRAFT'
         )
@@ -53,22 +230,21 @@ def create_page(project_id):
         if 'outline_content' in data:
             page.set_outline_content(data['outline_content'])
         
-        db.session.add(page)
-        
-        # Update other pages' order_index if necessary
-        other_pages = Page.query.filter(
-            Page.project_id == project_id,
-            Page.order_index >= data['order_index']
-        ).all()
+        if not is_append:
+            # Shift following pages with a single UPDATE (before inserting the new page)
+            Page.query.filter(
+                Page.project_id == project_id,
+                Page.order_index >= data['order_index']
+            ).update({Page.order_index: Page.order_index + 1}, synchronize_session=False)
         
-        for p in other_pages:
-            if p.id != page.id:
-                p.order_index += 1
+        db.session.add(page)
+        if not is_append:
+            _renumber_pages(project_id)
         
-        project.updated_at = datetime.utcnow()
+        project.updated_at = g.now
         db.session.commit()
         
-        return success_response(page.to_dict(), status_code=201)
+        return success_response(page.to_dict(fields=_get_requested_fields()), status_code=201)
     
     except Exception as e:
         db.session.rollback()
@@ -81,22 +257,24 @@ def delete_page(project_id, page_id):
     DELETE /api/projects/{project_id}/pages/{page_id} - Delete page
     """
     try:
-        page = Page.query.get(page_id)
+        page, project = _get_page_with_project(
+            project_id, page_id,
+            page_columns=(Page.id, Page.project_id, Page.status, Page.generated_image_path)
+        )
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
         # Delete page image if exists
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
         file_service.delete_page_image(project_id, page_id)
         
-        # Delete page
+        # Delete page and close the gap in order_index
         db.session.delete(page)
+        _renumber_pages(project_id)
         
         # Update project
-        project = Project.query.get(project_id)
-        if project:
-            project.updated_at = datetime.utcnow()
+        project.updated_at = g.now
         
         db.session.commit()
         
@@ -118,9 +296,9 @@ def update_page_outline(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page, project = _get_page_with_project(project_id, page_id)
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
         data = request.get_json()
@@ -129,16 +307,14 @@ def update_page_outline(project_id, page_id):
             return bad_request("outline_content is required")
         
         page.set_outline_content(data['outline_content'])
-        page.updated_at = datetime.utcnow()
+        page.updated_at = g.now
         
         # Update project
-        project = Project.query.get(project_id)
-        if project:
-            project.updated_at = datetime.utcnow()
+        project.updated_at = g.now
         
         db.session.commit()
         
-        return success_response(page.to_dict())
+        return success_response(page.to_dict(fields=_get_requested_fields()))
     
     except Exception as e:
         db.session.rollback()
@@ -160,9 +336,9 @@ def update_page_description(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page, project = _get_page_with_project(project_id, page_id)
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
         data = request.get_json()
@@ -171,16 +347,14 @@ def update_page_description(project_id, page_id):
             return bad_request("description_content is required")
         
         page.set_description_content(data['description_content'])
-        page.updated_at = datetime.utcnow()
+        page.updated_at = g.now
         
         # Update project
-        project = Project.query.get(project_id)
-        if project:
-            project.updated_at = datetime.utcnow()
+        project.updated_at = g.now
         
         db.session.commit()
         
-        return success_response(page.to_dict())
+        return success_response(page.to_dict(fields=_get_requested_fields()))
     
     except Exception as e:
         db.session.rollback()
@@ -198,21 +372,17 @@ def generate_page_description(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page, project = _get_page_with_project(project_id, page_id)
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
-        project = Project.query.get(project_id)
-        if not project:
-            return not_found('Project')
-        
         data = request.get_json() or {}
         force_regenerate = data.get('force_regenerate', False)
         language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
         
-        # Check if already generated
-        if page.get_description_content() and not force_regenerate:
+        # Check if already generated (skip parsing the JSON when regenerating anyway)
+        if not force_regenerate and page.get_description_content():
             return bad_request("Description already exists. Set force_regenerate=true to regenerate")
         
         # Get outline content
@@ -220,16 +390,8 @@ def generate_page_description(project_id, page_id):
         if not outline_content:
             return bad_request("Page must have outline content first")
         
-        # Reconstruct full outline
-        all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-        outline = []
-        for p in all_pages:
-            oc = p.get_outline_content()
-            if oc:
-                page_data = oc.copy()
-                if p.part:
-                    page_data['part'] = p.part
-                outline.append(page_data)
+        # Reconstruct full outline (cached per project revision)
+        outline = list(_build_outline(project_id, project.updated_at.isoformat()))
         
         # Initialize AI service
         ai_service = AIService()
@@ -239,32 +401,49 @@ def generate_page_description(project_id, page_id):
         reference_files_content = _get_project_reference_files_content(project_id)
         project_context = ProjectContext(project, reference_files_content)
         
-        # Generate description
-        page_data = outline_content.copy()
+        # Generate description (outline_content was freshly parsed above, no copy needed)
+        page_data = outline_content
         if page.part:
             page_data['part'] = page.part
         
-        desc_text = ai_service.generate_page_description(
+        # Create async task for description generation
+        task = Task(
+            project_id=project_id,
+            task_type='GENERATE_PAGE_DESCRIPTION',
+            status='PENDING'
+        )
+        task.set_progress({
+            'total': 1,
+            'completed': 0,
+            'failed': 0
+        })
+        db.session.add(task)
+        db.session.commit()
+        
+        # Get app instance for background task
+        app = current_app._get_current_object()
+        
+        # Submit background task
+        task_manager.submit_task(
+            task.id,
+            generate_single_page_description_task,
+            project_id,
+            page_id,
+            ai_service,
             project_context,
             outline,
             page_data,
             page.order_index + 1,
-            language=language
+            app,
+            language
         )
         
-        # Save description
-        desc_content = {
-            "text": desc_text,
-            "generated_at": datetime.utcnow().isoformat()
-        }
-        
-        page.set_description_content(desc_content)
-        page.status = 'DESCRIPTION_GENERATED'
-        page.updated_at = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return success_response(page.to_dict())
+        # Return task_id immediately
+        return success_response({
+            'task_id': task.id,
+            'page_id': page_id,
+            'status': 'PENDING'
+        }, status_code=202)
     
     except Exception as e:
         db.session.rollback()
@@ -283,15 +462,11 @@ def generate_page_image(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page, project = _get_page_with_project(project_id, page_id)
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
-        project = Project.query.get(project_id)
-        if not project:
-            return not_found('Project')
-        
         data = request.get_json() or {}
         use_template = data.get('use_template', True)
         force_regenerate = data.get('force_regenerate', False)
@@ -306,53 +481,8 @@ def generate_page_image(project_id, page_id):
         if not desc_content:
             return bad_request("Page must have description content first")
         
-        # Reconstruct full outline with part structure
-        all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-        outline = []
-        current_part = None
-        current_part_pages = []
-        
-        for p in all_pages:
-            oc = p.get_outline_content()
-            if not oc:
-                continue
-                
-            page_data = oc.copy()
-            
-            # 如果当前页面属于一个 part
-            if p.part:
-                # 如果这是新的 part，先保存之前的 part（如果有）
-                if current_part and current_part != p.part:
-                    outline.append({
-                        "part": current_part,
-                        "pages": current_part_pages
-                    })
-                    current_part_pages = []
-                
-                current_part = p.part
-                # 移除 part 字段，因为它在顶层
-                if 'part' in page_data:
-                    del page_data['part']
-                current_part_pages.append(page_data)
-            else:
-                # 如果当前页面不属于任何 part，先保存之前的 part（如果有）
-                if current_part:
-                    outline.append({
-                        "part": current_part,
-                        "pages": current_part_pages
-                    })
-                    current_part = None
-                    current_part_pages = []
-                
-                # 直接添加页面
-                outline.append(page_data)
-        
-        # 保存最后一个 part（如果有）
-        if current_part:
-            outline.append({
-                "part": current_part,
-                "pages": current_part_pages
-            })
+        # Reconstruct full outline with part structure (cached per project revision)
+        outline = list(_build_outline(project_id, project.updated_at.isoformat(), group_parts=True))
         
         # Initialize services
         ai_service = AIService()
@@ -369,33 +499,6 @@ def generate_page_image(project_id, page_id):
         if not ref_image_path and not project.template_style:
             return bad_request("No template image or style description found for project")
         
-        # Generate prompt
-        page_data = page.get_outline_content() or {}
-        if page.part:
-            page_data['part'] = page.part
-        
-        # 获取描述文本（可能是 text 字段或 text_content 数组）
-        desc_text = desc_content.get('text', '')
-        if not desc_text and desc_content.get('text_content'):
-            # 如果 text 字段不存在，尝试从 text_content 数组获取
-            text_content = desc_content.get('text_content', [])
-            if isinstance(text_content, list):
-                desc_text = '\n'.join(text_content)
-            else:
-                desc_text = str(text_content)
-        
-        # 从当前页面的描述内容中提取图片 URL（在生成 prompt 之前提取，以便告知 AI）
-        additional_ref_images = []
-        has_material_images = False
-        
-        # 从描述文本中提取图片
-        if desc_text:
-            image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-            if image_urls:
-                logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                additional_ref_images = image_urls
-                has_material_images = True
-        
         # 合并额外要求和风格描述
         combined_requirements = project.extra_requirements or ""
         if project.template_style:
@@ -470,18 +573,19 @@ def edit_page_image(project_id, page_id):
     - context_images: file uploads (multiple files with key "context_images")
     """
     try:
-        page = Page.query.get(page_id)
+        # outline_content is not needed for editing
+        page, project = _get_page_with_project(
+            project_id, page_id,
+            page_columns=(Page.id, Page.project_id, Page.status,
+                          Page.generated_image_path, Page.description_content)
+        )
         
-        if not page or page.project_id != project_id:
+        if not page:
             return not_found('Page')
         
         if not page.generated_image_path:
             return bad_request("Page must have generated image first")
         
-        project = Project.query.get(project_id)
-        if not project:
-            return not_found('Project')
-        
         # Initialize services
         ai_service = AIService()
         
@@ -667,11 +771,11 @@ def set_current_image_version(project_id, page_id, version_id):
         # Set this version as current
         version.is_current = True
         page.generated_image_path = version.image_path
-        page.updated_at = datetime.utcnow()
+        page.updated_at = g.now
         
         db.session.commit()
         
-        return success_response(page.to_dict(include_versions=True))
+        return success_response(page.to_dict(include_versions=True, fields=_get_requested_fields()))
     
     except Exception as e:
         db.session.rollback()
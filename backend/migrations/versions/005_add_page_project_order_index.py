@@ -0,0 +1,52 @@
+"""add (project_id, order_index) index to pages
+
+Revision ID: 005_page_project_order_idx
+Revises: 004_add_template_style
+Create Date: 2026-10-14 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '005_page_project_order_idx'
+down_revision = '004_add_template_style'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'ix_page_project_order'
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """Check if index exists"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    indexes = [idx['name'] for idx in inspector.get_indexes(table_name)]
+    return index_name in indexes
+
+
+def upgrade() -> None:
+    """
+    Add composite index on pages (project_id, order_index).
+    Serves the filter-by-project + order-by-order_index queries with a single index range scan.
+    """
+    if _index_exists('pages', INDEX_NAME):
+        return
+    
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX_NAME, 'pages', ['project_id', 'order_index'],
+                            unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index(INDEX_NAME, 'pages', ['project_id', 'order_index'], unique=False)
+
+
+def downgrade() -> None:
+    """
+    Remove composite index from pages table.
+    """
+    if _index_exists('pages', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='pages')
@@ -12,6 +12,10 @@ class Page(db.Model):
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        # 支持按项目过滤并按顺序排序的高频查询
+        db.Index('ix_page_project_order', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -62,21 +66,30 @@ class Page(db.Model):
         else:
             self.description_content = None
     
-    def to_dict(self, include_versions=False):
-        """Convert to dictionary"""
-        data = {
-            'page_id': self.id,
-            'order_index': self.order_index,
-            'part': self.part,
-            'outline_content': self.get_outline_content(),
-            'description_content': self.get_description_content(),
-            'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+    def to_dict(self, include_versions=False, fields=None):
+        """
+        Convert to dictionary
+        
+        Args:
+            include_versions: Whether to include image version history
+            fields: Optional collection of keys to include (e.g. {'page_id', 'status'}).
+                    None returns all keys; unselected values are not computed.
+                    'image_versions' is selectable too when include_versions is set.
+        """
+        getters = {
+            'page_id': lambda: self.id,
+            'order_index': lambda: self.order_index,
+            'part': lambda: self.part,
+            'outline_content': self.get_outline_content,
+            'description_content': self.get_description_content,
+            'generated_image_url': lambda: f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
+            'status': lambda: self.status,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
         }
+        data = {key: get() for key, get in getters.items() if fields is None or key in fields}
         
-        if include_versions:
+        if include_versions and (fields is None or 'image_versions' in fields):
             data['image_versions'] = [v.to_dict() for v in self.image_versions.all()]
         
         return data
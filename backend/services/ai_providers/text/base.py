@@ -20,3 +20,21 @@ class TextProvider(ABC):
             Generated text content
         """
         pass
+    
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text for a prompt made of a stable prefix and a variable suffix
+        
+        Providers that support server-side context caching can override this to
+        cache the prefix once and reuse it across calls. The default simply sends
+        the concatenated prompt, which still benefits from implicit prefix caching.
+        
+        Args:
+            prefix: Shared part of the prompt (identical across related calls)
+            suffix: Per-call part of the prompt
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            
+        Returns:
+            Generated text content
+        """
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
@@ -5,15 +5,58 @@ Supports two modes:
 - Google AI Studio: Uses API key authentication
 - Vertex AI: Uses GCP service account authentication
 """
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from google import genai
-from google.genai import types
-from tenacity import retry, stop_after_attempt, wait_exponential
+from google.genai import errors, types
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from .base import TextProvider
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
+# 上下文缓存句柄（进程内共享）: sha256(client + model + prefix) -> (cache_name or None, expires_at)
+_CONTEXT_CACHE_MAX_ENTRIES = 256
+_CONTEXT_CACHE_UNSUPPORTED_RETRY = 3600  # 端点不支持缓存时，多久之后再尝试（秒）
+_context_caches = OrderedDict()
+_context_caches_lock = threading.Lock()
+_context_cache_key_locks = {}  # cache_key -> Lock，串行化同一前缀的缓存创建
+_context_cache_unsupported = {}  # client_key -> expires_at，该凭据/端点不支持 cachedContents（如部分代理）
+
+
+def _lookup_context_cache(cache_key: str):
+    """Return the unexpired (cache_name, expires_at) entry; caller must hold _context_caches_lock"""
+    entry = _context_caches.get(cache_key)
+    if entry and entry[1] > time.time():
+        _context_caches.move_to_end(cache_key)
+        return entry
+    return None
+
+
+def _is_prefix_too_small_error(e: Exception) -> bool:
+    """caches.create rejected the prefix for being below the model's minimum cache size"""
+    message = str(e).lower()
+    return 'too small' in message or 'min_total_token_count' in message or 'minimum token count' in message
+
+
+def _is_cache_unsupported_error(e: Exception) -> bool:
+    """caches.create was refused by the endpoint itself, not because of the prefix or a transient error"""
+    return (
+        isinstance(e, errors.APIError)
+        and e.code in (400, 403, 404, 405, 501)
+        and not _is_prefix_too_small_error(e)
+    )
+
+
+def _is_cache_handle_error(e: Exception) -> bool:
+    """A request using cached_content failed because the handle is no longer usable"""
+    return isinstance(e, errors.APIError) and (
+        e.code in (403, 404) or (e.code == 400 and 'cache' in str(e).lower())
+    )
+
 
 class GenAITextProvider(TextProvider):
     """Text generation using Google GenAI SDK (supports both AI Studio and Vertex AI)"""
@@ -62,6 +105,10 @@ class GenAITextProvider(TextProvider):
             )
 
         self.model = model
+        # 标识当前凭据/端点：更换 API Key 或代理地址后不会复用旧配置下创建的缓存句柄
+        self._client_key = hashlib.sha256(
+            f"{vertexai}\n{project_id}\n{location}\n{api_key}\n{api_base}".encode('utf-8')
+        ).hexdigest()
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -86,3 +133,110 @@ class GenAITextProvider(TextProvider):
             ),
         )
         return response.text
+    
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text with the prefix stored as Gemini cached content
+        
+        Only worth calling when the same prefix is reused by several requests (e.g. batch
+        page descriptions): the cached content handle is created once per distinct
+        (client, model, prefix) and reused until it expires. Sends the full prompt instead
+        if caching is disabled, the prefix is shorter than GENAI_CONTEXT_CACHE_MIN_CHARS,
+        the endpoint does not support cachedContents, or the handle is no longer valid.
+        Transient errors on the cached request are retried with the handle kept.
+        
+        Args:
+            prefix: Shared part of the prompt (identical across related calls)
+            suffix: Per-call part of the prompt
+            thinking_budget: Thinking budget for the model
+            
+        Returns:
+            Generated text
+        """
+        cache_key = hashlib.sha256(
+            f"{self._client_key}\n{self.model}\n{prefix}".encode('utf-8')
+        ).hexdigest()
+        cache_name = self._get_context_cache(cache_key, prefix)
+        
+        if cache_name:
+            try:
+                return self._generate_with_cached_content(cache_name, suffix, thinking_budget)
+            except errors.APIError as e:
+                if not _is_cache_handle_error(e):
+                    raise
+                logger.warning(f"Cached content {cache_name} is no longer usable, sending full prompt: {e}")
+                with _context_caches_lock:
+                    _context_caches.pop(cache_key, None)
+        
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception(lambda e: not _is_cache_handle_error(e))
+    )
+    def _generate_with_cached_content(self, cache_name: str, suffix: str, thinking_budget: int) -> str:
+        """Generate text from the per-call suffix on top of a cached prefix"""
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=suffix,
+            config=types.GenerateContentConfig(
+                cached_content=cache_name,
+                thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+            ),
+        )
+        return response.text
+    
+    def _get_context_cache(self, cache_key: str, prefix: str):
+        """Get or create the cached content handle for a prompt prefix"""
+        config = get_config()
+        ttl = config.GENAI_CONTEXT_CACHE_TTL
+        # 前缀过短时低于模型的最小缓存长度，创建必然失败，直接发送完整 prompt
+        if ttl <= 0 or len(prefix) < config.GENAI_CONTEXT_CACHE_MIN_CHARS:
+            return None
+        
+        with _context_caches_lock:
+            if _context_cache_unsupported.get(self._client_key, 0) > time.time():
+                return None
+            entry = _lookup_context_cache(cache_key)
+            if entry:
+                return entry[0]
+            key_lock = _context_cache_key_locks.setdefault(cache_key, threading.Lock())
+        
+        # 只串行化同一前缀的创建，避免并发生成同一项目的多个页面时重复创建；
+        # 创建缓存的网络请求不持有全局锁，不会阻塞其他项目或缓存命中
+        with key_lock:
+            with _context_caches_lock:
+                entry = _lookup_context_cache(cache_key)
+                if entry:
+                    return entry[0]
+            
+            try:
+                cache = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        contents=[prefix],
+                        ttl=f"{ttl}s",
+                    ),
+                )
+                cache_name = cache.name
+                logger.debug(f"Created context cache {cache_name} for model {self.model}")
+            except Exception as e:
+                cache_name = None
+                if _is_cache_unsupported_error(e):
+                    # 端点不支持缓存（如部分代理），对该凭据/端点整体停用，而不是逐个前缀重试
+                    logger.info(f"Context caching not supported by this endpoint, disabling it: {e}")
+                    with _context_caches_lock:
+                        _context_cache_unsupported[self._client_key] = time.time() + _CONTEXT_CACHE_UNSUPPORTED_RETRY
+                        _context_cache_key_locks.pop(cache_key, None)
+                    return None
+                # 前缀过短或临时错误：记录为 None，在过期前不再重复尝试
+                logger.info(f"Context cache not created, sending full prompts instead: {e}")
+            
+            with _context_caches_lock:
+                # 提前一点过期，避免使用即将失效的缓存
+                _context_caches[cache_key] = (cache_name, time.time() + max(ttl - 30, ttl / 2))
+                while len(_context_caches) > _CONTEXT_CACHE_MAX_ENTRIES:
+                    evicted_key, _ = _context_caches.popitem(last=False)
+                    _context_cache_key_locks.pop(evicted_key, None)
+            return cache_name
@@ -15,7 +15,7 @@ from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from .prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
-    get_page_description_prompt,
+    get_page_description_prompt_parts,
     get_image_generation_prompt,
     get_image_edit_prompt,
     get_description_to_outline_prompt,
@@ -274,7 +274,8 @@ class AIService:
         return pages
     
     def generate_page_description(self, project_context: ProjectContext, outline: List[Dict], 
-                                 page_outline: Dict, page_index: int, language='zh') -> str:
+                                 page_outline: Dict, page_index: int, language='zh',
+                                 reuse_prefix: bool = False) -> str:
         """
         Generate description for a single page
         Based on demo.py gen_desc() logic
@@ -284,13 +285,15 @@ class AIService:
             outline: Complete outline
             page_outline: Outline for this specific page
             page_index: Page number (1-indexed)
+            reuse_prefix: 同一前缀会被多次调用复用（如批量生成）时为 True，允许 provider 缓存公共前缀
         
         Returns:
             Text description for the page
         """
         part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
         
-        desc_prompt = get_page_description_prompt(
+        # 公共前缀（参考文件、原始需求、完整大纲）对同一项目的每一页都相同
+        cached_prefix, variable_suffix = get_page_description_prompt_parts(
             project_context=project_context,
             outline=outline,
             page_outline=page_outline,
@@ -299,7 +302,15 @@ class AIService:
             language=language
         )
         
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=1000)
+        if reuse_prefix:
+            # 批量生成时交给 provider 缓存前缀；单次调用创建缓存只会增加延迟和存储费用
+            response_text = self.text_provider.generate_text_with_prefix(
+                cached_prefix, variable_suffix, thinking_budget=1000
+            )
+        else:
+            response_text = self.text_provider.generate_text(
+                cached_prefix + variable_suffix, thinking_budget=1000
+            )
         
         return dedent(response_text)
     
@@ -239,6 +239,31 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
     Returns:
         格式化后的 prompt 字符串
     """
+    prefix, suffix = get_page_description_prompt_parts(
+        project_context, outline, page_outline, page_index,
+        part_info=part_info, language=language
+    )
+    final_prompt = prefix + suffix
+    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
+    return final_prompt
+
+
+def get_page_description_prompt_parts(project_context: 'ProjectContext', outline: list, 
+                                      page_outline: dict, page_index: int, 
+                                      part_info: str = "",
+                                      language: str = None) -> tuple[str, str]:
+    """
+    生成单个页面描述的 prompt，拆分为可缓存的公共前缀和逐页变化的后缀
+    
+    前缀（参考文件、原始需求、完整大纲）对同一项目的所有页面都相同，
+    可用于模型服务端的上下文缓存；prefix + suffix 即完整 prompt。
+    
+    Args:
+        同 get_page_description_prompt
+        
+    Returns:
+        (prefix, suffix) 元组
+    """
     files_xml = _format_reference_files_xml(project_context.reference_files_content)
     # 根据项目类型选择最相关的原始输入
     if project_context.creation_type == 'idea' and project_context.idea_prompt:
@@ -250,10 +275,13 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
     else:
         original_input = project_context.idea_prompt or ""
     
-    prompt = (f"""\
+    prefix = files_xml + (f"""\
 我们正在为PPT的每一页生成内容描述。
 用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
+我们已经有了完整的大纲：\n{outline}\n""")
+    
+    suffix = (f"""\
+{part_info}
 现在请为第 {page_index} 页生成描述：
 {page_outline}
 {"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
@@ -282,9 +310,7 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
-    return final_prompt
+    return prefix, suffix
 
 
 def get_image_generation_prompt(page_desc: str, outline_text: str, 
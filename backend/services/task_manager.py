@@ -2,6 +2,7 @@
 Task Manager - handles background tasks using ThreadPoolExecutor
 No need for Celery or Redis, uses in-memory task tracking
 """
+import json
 import logging
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -65,6 +66,30 @@ class TaskManager:
 task_manager = TaskManager(max_workers=4)
 
 
+def update_page_status(page_id: str, status: str) -> int:
+    """
+    更新页面状态的公共函数（仅状态变更）
+    
+    使用单条 Core UPDATE 语句，不经过 ORM 对象的脏检查和 flush。
+    注意：函数内会提交事务，会话中已加载的对象随之过期，再次访问其属性会重新查询整行，
+    因此调用方应在调用前读取好所需的页面字段。
+    
+    Args:
+        page_id: 页面ID
+        status: 新状态
+        
+    Returns:
+        匹配的行数（页面已被删除时为 0）
+    """
+    result = db.session.execute(
+        Page.__table__.update()
+        .where(Page.__table__.c.id == page_id)
+        .values(status=status, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount
+
+
 def save_image_with_version(image, project_id: str, page_id: str, file_service, 
                             page_obj=None, image_format: str = 'PNG') -> tuple[str, int]:
     """
@@ -83,18 +108,18 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
     
     这个函数会：
     1. 计算下一个版本号（使用 MAX 查询确保安全）
-    2. 标记所有旧版本为非当前版本
-    3. 保存图片到最终位置
+    2. 保存图片到最终位置
+    3. 标记所有旧版本为非当前版本
     4. 创建新版本记录
     5. 如果提供了 page_obj，更新页面状态和图片路径
+    
+    图片编码和写盘在任何数据库写操作之前完成，写事务只覆盖几条 SQL，
+    不会在保存大图期间持有数据库写锁（SQLite 下会阻塞其他写入）。
     """
     # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
     max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
     next_version = max_version + 1
     
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
-    
     # 保存图片到最终位置（使用版本号）
     image_path = file_service.save_generated_image(
         image, project_id, page_id,
@@ -102,6 +127,9 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         image_format=image_format
     )
     
+    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
+    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
+    
     # 创建新版本记录
     new_version = PageImageVersion(
         page_id=page_id,
@@ -192,7 +220,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                     try:
                         desc_text = ai_service.generate_page_description(
                             project_context, outline, page_outline, page_index,
-                            language=language
+                            language=language, reuse_prefix=len(pages) > 1
                         )
                         
                         # Parse description into structured format
@@ -223,25 +251,33 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                     
                     db.session.expire_all()
                     
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
+                    # Update page with a Core UPDATE; a page deleted mid-batch simply matches 0 rows
+                    if error:
+                        values = {'status': 'FAILED'}
+                    else:
+                        values = {
+                            'description_content': json.dumps(desc_content, ensure_ascii=False),
+                            'status': 'DESCRIPTION_GENERATED'
+                        }
+                    result = db.session.execute(
+                        Page.__table__.update()
+                        .where(Page.__table__.c.id == page_id)
+                        .values(updated_at=datetime.utcnow(), **values)
+                    )
+                    if result.rowcount:
                         if error:
-                            page.status = 'FAILED'
                             failed += 1
                         else:
-                            page.set_description_content(desc_content)
-                            page.status = 'DESCRIPTION_GENERATED'
                             completed += 1
-                        
-                        db.session.commit()
+                    else:
+                        logger.warning(f"Page {page_id} no longer exists, skipping description result")
                     
-                    # Update task progress
+                    # Update task progress, committed together with the page update
                     task = Task.query.get(task_id)
                     if task:
                         task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    db.session.commit()
+                    logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -260,7 +296,8 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 logger.info(f"Project {project_id} status updated to DESCRIPTIONS_GENERATED")
         
         except Exception as e:
-            # Mark task as failed
+            # Mark task as failed (discard any half-finished transaction first)
+            db.session.rollback()
             task = Task.query.get(task_id)
             if task:
                 task.status = 'FAILED'
@@ -330,13 +367,13 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         if not page_obj:
                             raise ValueError(f"Page {page_id} not found")
                         
+                        # Get description content（在更新状态前读取，提交后对象会过期）
+                        desc_content = page_obj.get_description_content()
+                        
                         # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
+                        update_page_status(page_id, 'GENERATING')
                         logger.debug(f"Page {page_id} status updated to GENERATING")
                         
-                        # Get description content
-                        desc_content = page_obj.get_description_content()
                         if not desc_content:
                             raise ValueError("No description content for page")
                         
@@ -420,17 +457,13 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                     db.session.expire_all()
                     
                     # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
+                    if error:
+                        # 页面在生成期间被删除时不计入失败
+                        if update_page_status(page_id, 'FAILED'):
                             failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
+                    else:
+                        # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
+                        completed += 1
                     
                     # Update task progress
                     task = Task.query.get(task_id)
@@ -465,6 +498,85 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 db.session.commit()
 
 
+def generate_single_page_description_task(task_id: str, project_id: str, page_id: str,
+                                          ai_service, project_context, outline: List[Dict],
+                                          page_outline: Dict, page_index: int,
+                                          app=None, language: str = None):
+    """
+    Background task for generating a single page description
+
+    Note: app instance MUST be passed from the request context
+
+    Args:
+        page_outline: Outline for this specific page (with optional 'part')
+        page_index: 1-based page number
+        language: Output language (zh, en, ja, auto)
+    """
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+
+    with app.app_context():
+        try:
+            # Update task status to PROCESSING
+            task = Task.query.get(task_id)
+            if not task:
+                return
+
+            task.status = 'PROCESSING'
+            db.session.commit()
+
+            # 释放数据库会话（归还连接），避免在长时间的 AI 调用期间占用连接
+            db.session.remove()
+
+            # Generate description
+            logger.info(f"📝 Generating description for page {page_id}...")
+            desc_text = ai_service.generate_page_description(
+                project_context, outline, page_outline, page_index,
+                language=language
+            )
+
+            desc_content = {
+                "text": desc_text,
+                "generated_at": datetime.utcnow().isoformat()
+            }
+
+            # 使用新会话重新加载对象（页面可能在生成期间被删除）
+            task = Task.query.get(task_id)
+            page = Page.query.get(page_id)
+            if not page or page.project_id != project_id:
+                raise ValueError(f"Page {page_id} not found")
+
+            page.set_description_content(desc_content)
+            page.status = 'DESCRIPTION_GENERATED'
+            page.updated_at = datetime.utcnow()
+
+            # Mark task as completed
+            task.status = 'COMPLETED'
+            task.completed_at = datetime.utcnow()
+            task.set_progress({
+                "total": 1,
+                "completed": 1,
+                "failed": 0
+            })
+            db.session.commit()
+
+            logger.info(f"✅ Task {task_id} COMPLETED - Page {page_id} description generated")
+
+        except Exception as e:
+            import traceback
+            error_detail = traceback.format_exc()
+            logger.error(f"Task {task_id} FAILED: {error_detail}")
+
+            # Mark task as failed (page keeps its previous description and status)
+            db.session.rollback()
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'FAILED'
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+
+
 def generate_single_page_image_task(task_id: str, project_id: str, page_id: str, 
                                     ai_service, file_service, outline: List[Dict],
                                     use_template: bool = True, aspect_ratio: str = "16:9",
@@ -494,12 +606,16 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             if not page or page.project_id != project_id:
                 raise ValueError(f"Page {page_id} not found")
             
+            # 在更新状态前读取页面字段（提交后对象会过期，再次访问会重新查询）
+            desc_content = page.get_description_content()
+            page_data = page.get_outline_content() or {}
+            if page.part:
+                page_data['part'] = page.part
+            page_index = page.order_index + 1
+            
             # Update page status
-            page.status = 'GENERATING'
-            db.session.commit()
+            update_page_status(page_id, 'GENERATING')
             
-            # Get description content
-            desc_content = page.get_description_content()
             if not desc_content:
                 raise ValueError("No description content for page")
             
@@ -531,17 +647,16 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 # 这个检查已经在 controller 层完成，这里不再检查
             
             # Generate image prompt
-            page_data = page.get_outline_content() or {}
-            if page.part:
-                page_data['part'] = page.part
-            
             prompt = ai_service.generate_image_prompt(
-                outline, page_data, desc_text, page.order_index + 1,
+                outline, page_data, desc_text, page_index,
                 has_material_images=has_material_images,
                 extra_requirements=extra_requirements,
                 language=language
             )
             
+            # 释放数据库会话（归还连接），避免在长时间的 AI 调用期间占用连接
+            db.session.remove()
+            
             # Generate image
             logger.info(f"🎨 Generating image for page {page_id}...")
             image = ai_service.generate_image(
@@ -552,6 +667,12 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             if not image:
                 raise ValueError("Failed to generate image")
             
+            # 使用新会话重新加载对象后再写入结果
+            task = Task.query.get(task_id)
+            page = Page.query.get(page_id)
+            if not page:
+                raise ValueError(f"Page {page_id} not found")
+            
             # 保存图片并创建历史版本记录
             image_path, next_version = save_image_with_version(
                 image, project_id, page_id, file_service, page_obj=page
@@ -583,10 +704,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 db.session.commit()
             
             # Update page status
-            page = Page.query.get(page_id)
-            if page:
-                page.status = 'FAILED'
-                db.session.commit()
+            update_page_status(page_id, 'FAILED')
 
 
 def edit_page_image_task(task_id: str, project_id: str, page_id: str,
@@ -621,12 +739,14 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
             if not page.generated_image_path:
                 raise ValueError("Page must have generated image first")
             
+            # Get current image path（在更新状态前读取，提交后对象会过期）
+            current_image_path = file_service.get_absolute_path(page.generated_image_path)
+            
             # Update page status
-            page.status = 'GENERATING'
-            db.session.commit()
+            update_page_status(page_id, 'GENERATING')
             
-            # Get current image path
-            current_image_path = file_service.get_absolute_path(page.generated_image_path)
+            # 释放数据库会话（归还连接），避免在长时间的 AI 调用期间占用连接
+            db.session.remove()
             
             # Edit image
             logger.info(f"🎨 Editing image for page {page_id}...")
@@ -651,6 +771,12 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
             if not image:
                 raise ValueError("Failed to edit image")
             
+            # 使用新会话重新加载对象后再写入结果
+            task = Task.query.get(task_id)
+            page = Page.query.get(page_id)
+            if not page:
+                raise ValueError(f"Page {page_id} not found")
+            
             # 保存编辑后的图片并创建历史版本记录
             image_path, next_version = save_image_with_version(
                 image, project_id, page_id, file_service, page_obj=page
@@ -690,10 +816,7 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
                 db.session.commit()
             
             # Update page status
-            page = Page.query.get(page_id)
-            if page:
-                page.status = 'FAILED'
-                db.session.commit()
+            update_page_status(page_id, 'FAILED')
 
 
 def generate_material_image_task(task_id: str, project_id: str, prompt: str,
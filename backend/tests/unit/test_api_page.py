@@ -0,0 +1,236 @@
+"""
+页面管理API单元测试
+"""
+
+import pytest
+from unittest.mock import patch
+from conftest import assert_success_response
+
+
+def _get_page_titles(client, project_id):
+    """按order_index顺序获取项目页面标题"""
+    response = client.get(f'/api/projects/{project_id}')
+    data = assert_success_response(response)
+    pages = sorted(data['data']['pages'], key=lambda p: p['order_index'])
+    return [(p['order_index'], p['outline_content']['title']) for p in pages]
+
+
+class TestPageCreate:
+    """页面创建测试"""
+    
+    def test_create_page_shifts_following_pages(self, client, sample_project):
+        """测试在中间插入页面时后续页面顺序后移"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        for i, title in enumerate(['第一页', '第二页']):
+            response = client.post(f'/api/projects/{project_id}/pages', json={
+                'order_index': i,
+                'outline_content': {'title': title, 'points': []}
+            })
+            assert_success_response(response, 201)
+        
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 1,
+            'outline_content': {'title': '插入页', 'points': []}
+        })
+        data = assert_success_response(response, 201)
+        assert data['data']['order_index'] == 1
+        
+        assert _get_page_titles(client, project_id) == [
+            (0, '第一页'), (1, '插入页'), (2, '第二页')
+        ]
+    
+    def test_create_page_append_at_tail(self, client, sample_project):
+        """测试超出末尾的order_index被追加为最后一页"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 0,
+            'outline_content': {'title': '第一页', 'points': []}
+        })
+        assert_success_response(response, 201)
+        
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 10,
+            'outline_content': {'title': '末尾页', 'points': []}
+        })
+        data = assert_success_response(response, 201)
+        assert data['data']['order_index'] == 1
+        
+        assert _get_page_titles(client, project_id) == [(0, '第一页'), (1, '末尾页')]
+    
+    def test_create_page_missing_order_index(self, client, sample_project):
+        """测试缺少order_index参数"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        response = client.post(f'/api/projects/{sample_project["project_id"]}/pages', json={
+            'outline_content': {'title': '测试', 'points': []}
+        })
+        
+        assert response.status_code == 400
+
+
+class TestPageDelete:
+    """页面删除测试"""
+    
+    def test_delete_page_renumbers_remaining_pages(self, client, sample_project):
+        """测试删除页面后剩余页面order_index连续"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        page_ids = []
+        for i, title in enumerate(['第一页', '第二页', '第三页']):
+            response = client.post(f'/api/projects/{project_id}/pages', json={
+                'order_index': i,
+                'outline_content': {'title': title, 'points': []}
+            })
+            data = assert_success_response(response, 201)
+            page_ids.append(data['data']['page_id'])
+        
+        response = client.delete(f'/api/projects/{project_id}/pages/{page_ids[1]}')
+        assert_success_response(response)
+        
+        assert _get_page_titles(client, project_id) == [(0, '第一页'), (1, '第三页')]
+    
+    def test_delete_page_not_found(self, client, sample_project):
+        """测试删除不存在的页面"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        response = client.delete(f'/api/projects/{sample_project["project_id"]}/pages/00000000-0000-0000-0000-000000000000')
+        
+        assert response.status_code == 404
+
+
+class TestPageGenerateDescription:
+    """单页描述生成测试"""
+    
+    def test_generate_description_returns_task(self, client, sample_project):
+        """测试生成单页描述时返回202和任务ID，并提交后台任务"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 0,
+            'outline_content': {'title': '第一页', 'points': []}
+        })
+        page_id = assert_success_response(response, 201)['data']['page_id']
+        
+        with patch('controllers.page_controller.AIService'), \
+                patch('controllers.page_controller.task_manager') as mock_task_manager:
+            response = client.post(
+                f'/api/projects/{project_id}/pages/{page_id}/generate/description',
+                json={'force_regenerate': True}
+            )
+        
+        data = assert_success_response(response, 202)
+        assert data['data']['page_id'] == page_id
+        assert data['data']['status'] == 'PENDING'
+        
+        task_id = data['data']['task_id']
+        submitted = mock_task_manager.submit_task.call_args.args
+        assert submitted[0] == task_id
+        assert submitted[1].__name__ == 'generate_single_page_description_task'
+        
+        response = client.get(f'/api/projects/{project_id}/tasks/{task_id}')
+        task = assert_success_response(response)['data']
+        assert task['task_type'] == 'GENERATE_PAGE_DESCRIPTION'
+        assert task['status'] == 'PENDING'
+    
+    def test_outline_cached_per_project_revision(self, client, sample_project):
+        """测试同一项目版本复用缓存的大纲，修改大纲后重新构建"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        from controllers import page_controller
+        
+        project_id = sample_project['project_id']
+        page_ids = []
+        for i, title in enumerate(['第一页', '第二页']):
+            response = client.post(f'/api/projects/{project_id}/pages', json={
+                'order_index': i,
+                'outline_content': {'title': title, 'points': []}
+            })
+            page_ids.append(assert_success_response(response, 201)['data']['page_id'])
+        
+        def generate(page_id):
+            response = client.post(
+                f'/api/projects/{project_id}/pages/{page_id}/generate/description', json={}
+            )
+            assert_success_response(response, 202)
+            # submit_task(task_id, func, project_id, page_id, ai_service, project_context, outline, ...)
+            outline = mock_task_manager.submit_task.call_args.args[6]
+            return [item['title'] for item in outline]
+        
+        page_controller._build_outline.cache_clear()
+        with patch('controllers.page_controller.AIService'), \
+                patch('controllers.page_controller.task_manager') as mock_task_manager, \
+                patch('controllers.page_controller._load_page_outlines',
+                      wraps=page_controller._load_page_outlines) as mock_load:
+            assert generate(page_ids[0]) == ['第一页', '第二页']
+            assert generate(page_ids[1]) == ['第一页', '第二页']
+            assert mock_load.call_count == 1
+            
+            response = client.put(
+                f'/api/projects/{project_id}/pages/{page_ids[1]}/outline',
+                json={'outline_content': {'title': '修改后', 'points': []}}
+            )
+            assert_success_response(response)
+            
+            assert generate(page_ids[0]) == ['第一页', '修改后']
+            assert mock_load.call_count == 2
+
+
+class TestPageFields:
+    """页面响应字段选择测试"""
+    
+    def test_update_outline_with_fields_param(self, client, sample_project):
+        """测试通过fields参数只返回部分字段"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 0,
+            'outline_content': {'title': '第一页', 'points': []}
+        })
+        page_id = assert_success_response(response, 201)['data']['page_id']
+        
+        response = client.put(
+            f'/api/projects/{project_id}/pages/{page_id}/outline?fields=page_id,status',
+            json={'outline_content': {'title': '修改后', 'points': []}}
+        )
+        data = assert_success_response(response)
+        assert data['data'] == {'page_id': page_id, 'status': 'DRAFT'}
+    
+    def test_set_current_image_version_with_fields_param(self, client, sample_project):
+        """测试设置当前图片版本时fields参数同样控制image_versions"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        from models import db, PageImageVersion
+        
+        project_id = sample_project['project_id']
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 0,
+            'outline_content': {'title': '第一页', 'points': []}
+        })
+        page_id = assert_success_response(response, 201)['data']['page_id']
+        version = PageImageVersion(page_id=page_id, image_path=f'{project_id}/pages/v1.png', version_number=1)
+        db.session.add(version)
+        db.session.commit()
+        url = f'/api/projects/{project_id}/pages/{page_id}/image-versions/{version.id}/set-current'
+        
+        data = assert_success_response(client.post(f'{url}?fields=status'))
+        assert data['data'] == {'status': 'DRAFT'}
+        
+        data = assert_success_response(client.post(f'{url}?fields=page_id,image_versions'))
+        assert set(data['data']) == {'page_id', 'image_versions'}
+        assert [v['version_id'] for v in data['data']['image_versions']] == [version.id]
@@ -0,0 +1,185 @@
+"""
+页面描述 prompt 前缀缓存单元测试
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from google.genai import errors
+from tenacity import wait_none
+
+
+def _api_error(code, message):
+    """构造 google-genai 的 API 错误"""
+    return errors.ClientError(code, {'error': {'code': code, 'message': message, 'status': 'ERROR'}})
+
+
+@pytest.fixture
+def genai_provider(monkeypatch):
+    """创建使用mock客户端的 GenAITextProvider，并清空进程内缓存"""
+    from config import get_config
+    from services.ai_providers.text import genai_provider as module
+    
+    monkeypatch.setattr(get_config(), 'GENAI_CONTEXT_CACHE_TTL', 600)
+    monkeypatch.setattr(get_config(), 'GENAI_CONTEXT_CACHE_MIN_CHARS', 0)
+    # 重试不等待，避免测试变慢
+    monkeypatch.setattr(module.GenAITextProvider._generate_with_cached_content.retry, 'wait', wait_none())
+    for cache in (module._context_caches, module._context_cache_key_locks, module._context_cache_unsupported):
+        cache.clear()
+    
+    provider = object.__new__(module.GenAITextProvider)
+    provider.client = MagicMock()
+    provider.model = 'test-model'
+    provider._client_key = 'test-client'
+    yield provider
+    
+    for cache in (module._context_caches, module._context_cache_key_locks, module._context_cache_unsupported):
+        cache.clear()
+
+
+def _cached_provider(genai_provider, cache_name):
+    """让 mock 客户端的 caches.create 返回指定句柄"""
+    genai_provider.client.caches.create.return_value = MagicMock()
+    genai_provider.client.caches.create.return_value.name = cache_name
+    return genai_provider
+
+
+def _contents_of(call):
+    return call.kwargs['contents']
+
+
+def _cached_content_of(call):
+    return call.kwargs['config'].cached_content
+
+
+class TestPageDescriptionPromptParts:
+    """prompt 前缀/后缀拆分测试"""
+    
+    @pytest.mark.parametrize('creation_type', ['idea', 'outline', 'descriptions'])
+    @pytest.mark.parametrize('page_index', [1, 2])
+    def test_parts_concatenate_to_full_prompt(self, creation_type, page_index):
+        """测试 prefix + suffix 与完整 prompt 完全一致"""
+        from services.ai_service import ProjectContext
+        from services.prompts import get_page_description_prompt, get_page_description_prompt_parts
+        
+        project_context = ProjectContext({
+            'idea_prompt': '关于AI的PPT',
+            'outline_text': '1. 简介\n2. 应用',
+            'description_text': '第一页：简介',
+            'creation_type': creation_type,
+        }, [{'filename': 'ref.md', 'content': '参考内容'}])
+        outline = [{'title': '简介', 'points': ['a']}, {'title': '应用', 'points': ['b'], 'part': '第二部分'}]
+        kwargs = dict(
+            project_context=project_context,
+            outline=outline,
+            page_outline=outline[page_index - 1],
+            page_index=page_index,
+            part_info="\nThis page belongs to: 第二部分" if page_index == 2 else "",
+            language='zh',
+        )
+        
+        prefix, suffix = get_page_description_prompt_parts(**kwargs)
+        
+        assert prefix + suffix == get_page_description_prompt(**kwargs)
+        assert str(outline) in prefix
+
+
+class TestGenAIContextCache:
+    """Gemini 上下文缓存测试"""
+    
+    def test_cache_hit_reuses_handle(self, genai_provider):
+        """测试同一前缀只创建一次缓存，后续请求只发送后缀"""
+        _cached_provider(genai_provider, 'cachedContents/abc')
+        genai_provider.client.models.generate_content.return_value = MagicMock(text='结果')
+        
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀1') == '结果'
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀2') == '结果'
+        
+        assert genai_provider.client.caches.create.call_count == 1
+        calls = genai_provider.client.models.generate_content.call_args_list
+        assert [_contents_of(c) for c in calls] == ['后缀1', '后缀2']
+        assert all(_cached_content_of(c) == 'cachedContents/abc' for c in calls)
+    
+    def test_short_prefix_skips_cache(self, genai_provider, monkeypatch):
+        """测试前缀短于最小长度时不创建缓存，直接发送完整 prompt"""
+        from config import get_config
+        
+        monkeypatch.setattr(get_config(), 'GENAI_CONTEXT_CACHE_MIN_CHARS', 100)
+        genai_provider.client.models.generate_content.return_value = MagicMock(text='结果')
+        
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀') == '结果'
+        
+        genai_provider.client.caches.create.assert_not_called()
+        assert _contents_of(genai_provider.client.models.generate_content.call_args) == '前缀后缀'
+    
+    def test_cache_key_includes_client(self, genai_provider):
+        """测试更换凭据/端点后不复用旧客户端创建的缓存句柄"""
+        _cached_provider(genai_provider, 'cachedContents/abc')
+        genai_provider.client.models.generate_content.return_value = MagicMock(text='结果')
+        
+        genai_provider.generate_text_with_prefix('前缀', '后缀')
+        genai_provider._client_key = 'other-client'
+        genai_provider.generate_text_with_prefix('前缀', '后缀')
+        
+        assert genai_provider.client.caches.create.call_count == 2
+    
+    def test_rejected_create_is_remembered(self, genai_provider):
+        """测试缓存创建失败时发送完整 prompt，且在过期前不再重试创建"""
+        from services.ai_providers.text import genai_provider as module
+        
+        genai_provider.client.caches.create.side_effect = _api_error(400, 'Cached content is too small')
+        genai_provider.client.models.generate_content.return_value = MagicMock(text='结果')
+        
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀1') == '结果'
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀2') == '结果'
+        
+        assert genai_provider.client.caches.create.call_count == 1
+        calls = genai_provider.client.models.generate_content.call_args_list
+        assert [_contents_of(c) for c in calls] == ['前缀后缀1', '前缀后缀2']
+        assert all(_cached_content_of(c) is None for c in calls)
+        assert [name for name, _ in module._context_caches.values()] == [None]
+    
+    def test_unsupported_endpoint_is_remembered_per_client(self, genai_provider):
+        """测试端点不支持缓存时，对该客户端的其他前缀也不再尝试创建"""
+        genai_provider.client.caches.create.side_effect = _api_error(404, 'Not Found')
+        genai_provider.client.models.generate_content.return_value = MagicMock(text='结果')
+        
+        genai_provider.generate_text_with_prefix('前缀1', '后缀')
+        genai_provider.generate_text_with_prefix('前缀2', '后缀')
+        
+        assert genai_provider.client.caches.create.call_count == 1
+        calls = genai_provider.client.models.generate_content.call_args_list
+        assert [_contents_of(c) for c in calls] == ['前缀1后缀', '前缀2后缀']
+    
+    def test_transient_error_keeps_handle(self, genai_provider):
+        """测试使用缓存的请求遇到限流时保留句柄并重试，而不是发送完整 prompt"""
+        from services.ai_providers.text import genai_provider as module
+        
+        _cached_provider(genai_provider, 'cachedContents/abc')
+        genai_provider.client.models.generate_content.side_effect = [
+            _api_error(429, 'Resource exhausted'),
+            MagicMock(text='结果'),
+        ]
+        
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀') == '结果'
+        
+        calls = genai_provider.client.models.generate_content.call_args_list
+        assert [_contents_of(c) for c in calls] == ['后缀', '后缀']
+        assert [name for name, _ in module._context_caches.values()] == ['cachedContents/abc']
+    
+    def test_cached_request_failure_falls_back(self, genai_provider):
+        """测试缓存句柄失效时回退到完整 prompt 并丢弃缓存句柄"""
+        from services.ai_providers.text import genai_provider as module
+        
+        _cached_provider(genai_provider, 'cachedContents/expired')
+        genai_provider.client.models.generate_content.side_effect = [
+            _api_error(404, 'CachedContent not found'),
+            MagicMock(text='回退结果'),
+        ]
+        
+        assert genai_provider.generate_text_with_prefix('前缀', '后缀') == '回退结果'
+        
+        calls = genai_provider.client.models.generate_content.call_args_list
+        assert _cached_content_of(calls[0]) == 'cachedContents/expired'
+        assert _contents_of(calls[1]) == '前缀后缀'
+        assert _cached_content_of(calls[1]) is None
+        assert module._context_caches == {}
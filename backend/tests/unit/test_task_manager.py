@@ -0,0 +1,162 @@
+"""
+后台任务单元测试
+"""
+
+from unittest.mock import MagicMock
+
+
+def _create_project_with_pages(titles, task_type):
+    """直接在数据库中创建项目、页面和任务，返回 (project_id, page_ids, task_id)"""
+    from models import db, Project, Page, Task
+    
+    project = Project(creation_type='idea', idea_prompt='测试')
+    db.session.add(project)
+    db.session.flush()
+    pages = []
+    for i, title in enumerate(titles):
+        page = Page(project_id=project.id, order_index=i, status='DRAFT')
+        page.set_outline_content({'title': title, 'points': []})
+        db.session.add(page)
+        pages.append(page)
+    task = Task(project_id=project.id, task_type=task_type, status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+    return project.id, [page.id for page in pages], task.id
+
+
+class TestGenerateDescriptionsTask:
+    """批量生成描述任务测试"""
+    
+    def test_page_deleted_during_batch(self, app, client):
+        """测试批量生成过程中页面被删除时任务仍能正常完成"""
+        from models import db, Page, Task
+        from services.task_manager import generate_descriptions_task
+        
+        project_id, page_ids, task_id = _create_project_with_pages(
+            ['第一页', '第二页'], 'GENERATE_DESCRIPTIONS'
+        )
+        deleted_page_id, kept_page_id = page_ids
+        outline = [{'title': '第一页', 'points': []}, {'title': '第二页', 'points': []}]
+        
+        def generate_page_description(project_context, outline, page_outline, page_index, **kwargs):
+            # 模拟用户在生成第一页期间删除了该页面
+            if page_index == 1:
+                db.session.delete(Page.query.get(deleted_page_id))
+                db.session.commit()
+            return f"描述{page_index}"
+        
+        ai_service = MagicMock()
+        ai_service.flatten_outline.return_value = outline
+        ai_service.generate_page_description.side_effect = generate_page_description
+        
+        generate_descriptions_task(task_id, project_id, ai_service, MagicMock(), outline,
+                                   max_workers=1, app=app, language='zh')
+        
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress()['completed'] == 1
+        assert Page.query.get(deleted_page_id) is None
+        
+        kept_page = Page.query.get(kept_page_id)
+        assert kept_page.status == 'DESCRIPTION_GENERATED'
+        assert kept_page.get_description_content()['text'] == '描述2'
+
+
+class TestGenerateSinglePageDescriptionTask:
+    """单页生成描述任务测试"""
+    
+    def test_completed_task_writes_description(self, app, client):
+        """测试任务完成后写入描述并更新页面状态"""
+        from models import db, Page, Task
+        from services.task_manager import generate_single_page_description_task
+        
+        project_id, page_ids, task_id = _create_project_with_pages(
+            ['第一页'], 'GENERATE_PAGE_DESCRIPTION'
+        )
+        page_outline = {'title': '第一页', 'points': []}
+        
+        ai_service = MagicMock()
+        ai_service.generate_page_description.return_value = '新描述'
+        
+        generate_single_page_description_task(task_id, project_id, page_ids[0], ai_service,
+                                              MagicMock(), [page_outline], page_outline, 1,
+                                              app=app, language='zh')
+        
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress() == {'total': 1, 'completed': 1, 'failed': 0}
+        
+        page = Page.query.get(page_ids[0])
+        assert page.status == 'DESCRIPTION_GENERATED'
+        assert page.get_description_content()['text'] == '新描述'
+    
+    def test_page_deleted_during_generation(self, app, client):
+        """测试生成期间页面被删除时任务失败且不影响其他页面"""
+        from models import db, Page, Task
+        from services.task_manager import generate_single_page_description_task
+        
+        project_id, page_ids, task_id = _create_project_with_pages(
+            ['第一页', '第二页'], 'GENERATE_PAGE_DESCRIPTION'
+        )
+        deleted_page_id, other_page_id = page_ids
+        outline = [{'title': '第一页', 'points': []}, {'title': '第二页', 'points': []}]
+        
+        def generate_page_description(project_context, outline, page_outline, page_index, language=None):
+            # 模拟用户在 AI 调用期间删除了该页面
+            db.session.delete(Page.query.get(deleted_page_id))
+            db.session.commit()
+            return '新描述'
+        
+        ai_service = MagicMock()
+        ai_service.generate_page_description.side_effect = generate_page_description
+        
+        generate_single_page_description_task(task_id, project_id, deleted_page_id, ai_service,
+                                              MagicMock(), outline, outline[0], 1,
+                                              app=app, language='zh')
+        
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.status == 'FAILED'
+        assert deleted_page_id in task.error_message
+        assert Page.query.get(deleted_page_id) is None
+        
+        other_page = Page.query.get(other_page_id)
+        assert other_page.status == 'DRAFT'
+        assert other_page.get_description_content() is None
+
+
+class TestGenerateImagesTask:
+    """批量生成图片任务测试"""
+    
+    def test_page_deleted_during_batch_not_counted_as_failed(self, app, client):
+        """测试批量生成过程中被删除的页面不计入失败，项目仍能完成"""
+        from models import db, Project, Page, Task
+        from services.task_manager import generate_images_task
+        
+        project_id, page_ids, task_id = _create_project_with_pages(['第一页'], 'GENERATE_IMAGES')
+        page = Page.query.get(page_ids[0])
+        page.set_description_content({'text': '描述1'})
+        db.session.commit()
+        outline = [{'title': '第一页', 'points': []}]
+        
+        def generate_image(*args, **kwargs):
+            # 模拟用户在生成图片期间删除了该页面
+            db.session.delete(Page.query.get(page_ids[0]))
+            db.session.commit()
+            return None
+        
+        ai_service = MagicMock()
+        ai_service.flatten_outline.return_value = outline
+        ai_service.extract_image_urls_from_markdown.return_value = []
+        ai_service.generate_image.side_effect = generate_image
+        
+        generate_images_task(task_id, project_id, ai_service, MagicMock(), outline,
+                             use_template=False, max_workers=1, app=app, language='zh')
+        
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress()['failed'] == 0
+        assert Project.query.get(project_id).status == 'COMPLETED'
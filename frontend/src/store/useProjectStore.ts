@@ -3,6 +3,10 @@ import type { Project, Task } from '@/types';
 import * as api from '@/api/endpoints';
 import { debounce, normalizeProject, normalizeErrorMessage } from '@/utils';
 
+// 单页描述任务轮询间隔与最大次数（约5分钟；任务保存在后端内存中，服务重启后会一直停留在处理中）
+const PAGE_DESCRIPTION_POLL_INTERVAL = 2000;
+const PAGE_DESCRIPTION_POLL_MAX_ATTEMPTS = 150;
+
 interface ProjectState {
   // 状态
   currentProject: Project | null;
@@ -86,6 +90,35 @@ const debouncedUpdatePage = debounce(
   1000
 );
 
+  // 轮询单页描述任务直到完成；单次查询出错时继续轮询，超过最大次数则放弃
+  const pollPageDescriptionTask = (projectId: string, taskId: string) =>
+    new Promise<void>((resolve, reject) => {
+      let attempts = 0;
+      const poll = async () => {
+        attempts += 1;
+        try {
+          const response = await api.getTaskStatus(projectId, taskId);
+          const task = response.data;
+          if (!task || task.status === 'COMPLETED') {
+            resolve();
+            return;
+          }
+          if (task.status === 'FAILED') {
+            reject(new Error(task.error_message || task.error || '生成描述失败'));
+            return;
+          }
+        } catch (error: any) {
+          console.error('[生成描述] 轮询错误:', error);
+        }
+        if (attempts >= PAGE_DESCRIPTION_POLL_MAX_ATTEMPTS) {
+          reject(new Error('生成描述超时，请稍后刷新页面查看结果'));
+          return;
+        }
+        setTimeout(poll, PAGE_DESCRIPTION_POLL_INTERVAL);
+      };
+      setTimeout(poll, PAGE_DESCRIPTION_POLL_INTERVAL);
+    });
+
   return {
   // 初始状态
   currentProject: null,
@@ -618,7 +651,13 @@ const debouncedUpdatePage = debounce(
       await get().syncProject();
       
       // 传递 force_regenerate=true 以允许重新生成已有描述
-      await api.generatePageDescription(currentProject.id, pageId, true);
+      const response = await api.generatePageDescription(currentProject.id, pageId, true);
+      const taskId = response.data?.task_id;
+      
+      // 后端异步生成，轮询任务状态直到完成
+      if (taskId) {
+        await pollPageDescriptionTask(currentProject.id, taskId);
+      }
       
       // 刷新项目数据
       await get().syncProject();